@@ -853,4 +853,1439 @@ Peg Column
 select 'America' as Continent, Customer.* from Customer where Country = 'USA' or Country = 'Canada'
 union
 select 'Europe' as Continent, Customer.* from Customer where Country = 'United Kingdom' or Country = 'Spain' or Country = 'Germany';
-this creates a brand new column called continent and allocates America to usa and cananda and allocates europe to uk, spain and germany
\ No newline at end of file
+this creates a brand new column called continent and allocates America to usa and cananda and allocates europe to uk, spain and germany
+
+
+-- REPORTING BY DATE WITH SQL
+/*
+  Lots of questions about invoices are really questions about a window of time:
+  the newest invoices first, the biggest invoices with the most recent as the tie breaker,
+  revenue for last month, revenue by BillingCountry for a year.
+
+  Without help, every one of those queries reads the whole Invoice table, even if we only
+  care about one month of it. We can fix that in two ways:
+
+    1. An Index on InvoiceDate. The rows are kept sorted by date inside the index, so the
+       database can jump straight to the first row in the window and stop at the last one.
+       Work done depends on the size of the window, not the size of the table.
+       InvoiceLine already has an index on InvoiceId (IFK_InvoiceLineInvoiceId), so once we
+       have found the invoices in the window, their lines are found the same way.
+
+    2. A summary (rollup) table that stores the revenue for each day and country.
+       Reports read the summary instead of adding up every invoice again.
+
+  NOTE: MySQL can also PARTITION a table by a date range, but a partitioned table can't have
+  foreign keys, and Invoice (CustomerId) and InvoiceLine (InvoiceId) both need them.
+  The index gives us the same "skip what can't match" behaviour without giving those up.
+*/
+
+-- Index the date, and the Total with the date as the tie breaker
+-- These will throw an error if the indexes already exist (if you run this lesson twice). That's ok.
+create index IX_InvoiceDate on Invoice (InvoiceDate);
+create index IX_InvoiceTotalDate on Invoice (Total, InvoiceDate);
+
+
+-- Newest invoices first. The index is read backwards, no sorting needed.
+-- Run 'explain' in front of the query and check the 'key' column says IX_InvoiceDate
+-- Expected : 2013-12-22 00:00:00 first
+select InvoiceId, InvoiceDate, BillingCity, Total from Invoice
+order by InvoiceDate desc
+limit 5;
+
+
+-- Biggest invoices, most recent first when the Total is the same
+-- Expected : 2013-11-13 00:00:00  Prague  25.86 first
+select InvoiceDate, BillingCity, Total from Invoice
+order by Total desc, InvoiceDate desc
+limit 10;
+
+
+-- All invoices (and their lines) for November 2013. Only the rows in the window are read.
+-- Use '>=' and '<' rather than month(InvoiceDate) = 11, wrapping the column in a
+-- function stops the database from using the index.
+-- Expected : 7 invoices
+select * from Invoice
+where InvoiceDate >= '2013-11-01' and InvoiceDate < '2013-12-01';
+
+select InvoiceLine.* from Invoice
+join InvoiceLine on Invoice.InvoiceId = InvoiceLine.InvoiceId
+where Invoice.InvoiceDate >= '2013-11-01' and Invoice.InvoiceDate < '2013-12-01';
+
+
+-- Drop the summary table if it's already there
+Drop table if exists InvoiceRevenueDaily;
+
+-- One row per day, per country.
+CREATE TABLE InvoiceRevenueDaily
+(
+    InvoiceDay DATE NOT NULL,
+    BillingCountry NVARCHAR(40) NOT NULL,
+    Revenue NUMERIC(10,2) NOT NULL,
+    Invoices INTEGER NOT NULL,
+    CONSTRAINT PK_InvoiceRevenueDaily PRIMARY KEY  (InvoiceDay, BillingCountry)
+);
+
+-- Fill it from the invoices we already have
+-- Expected : 391 rows
+insert into InvoiceRevenueDaily (InvoiceDay, BillingCountry, Revenue, Invoices)
+select date(InvoiceDate), BillingCountry, sum(Total), count(*) from Invoice
+group by date(InvoiceDate), BillingCountry;
+
+
+/*
+  Keep the summary up to date with triggers.
+  A trigger runs a statement every time a row is inserted, updated or deleted.
+  'on duplicate key update' adds to the existing day/country row, or creates it if it's new.
+  'as Added' names the new values, so the update can say 'add the Added revenue to the Revenue'.
+  An update takes the old values out and puts the new ones in, in a single statement.
+*/
+Drop trigger if exists TR_Invoice_RevenueInsert;
+Drop trigger if exists TR_Invoice_RevenueUpdate;
+Drop trigger if exists TR_Invoice_RevenueDelete;
+
+create trigger TR_Invoice_RevenueInsert after insert on Invoice for each row
+  insert into InvoiceRevenueDaily (InvoiceDay, BillingCountry, Revenue, Invoices)
+  values (date(NEW.InvoiceDate), NEW.BillingCountry, NEW.Total, 1) as Added
+  on duplicate key update
+    Revenue = InvoiceRevenueDaily.Revenue + Added.Revenue,
+    Invoices = InvoiceRevenueDaily.Invoices + Added.Invoices;
+
+create trigger TR_Invoice_RevenueUpdate after update on Invoice for each row
+  insert into InvoiceRevenueDaily (InvoiceDay, BillingCountry, Revenue, Invoices)
+  values
+    (date(OLD.InvoiceDate), OLD.BillingCountry, -OLD.Total, -1),
+    (date(NEW.InvoiceDate), NEW.BillingCountry, NEW.Total, 1) as Added
+  on duplicate key update
+    Revenue = InvoiceRevenueDaily.Revenue + Added.Revenue,
+    Invoices = InvoiceRevenueDaily.Invoices + Added.Invoices;
+
+create trigger TR_Invoice_RevenueDelete after delete on Invoice for each row
+  update InvoiceRevenueDaily
+  set Revenue = Revenue - OLD.Total, Invoices = Invoices - 1
+  where InvoiceDay = date(OLD.InvoiceDate) and BillingCountry = OLD.BillingCountry;
+
+
+-- Revenue by day for November 2013
+select InvoiceDay, sum(Revenue) from InvoiceRevenueDaily
+where InvoiceDay >= '2013-11-01' and InvoiceDay < '2013-12-01'
+group by InvoiceDay;
+
+-- Revenue by month for 2013
+-- Expected : 12 rows, 2013-11 is 49.62
+select date_format(InvoiceDay, '%Y-%m') as Month, sum(Revenue) as Revenue from InvoiceRevenueDaily
+where InvoiceDay >= '2013-01-01' and InvoiceDay < '2014-01-01'
+group by Month;
+
+-- Revenue by year. 'with rollup' adds a grand total row at the end, with a NULL Year
+-- Expected : 6 rows (2009 to 2013, then the total)
+select year(InvoiceDay) as Year, sum(Revenue) as Revenue from InvoiceRevenueDaily
+group by year(InvoiceDay) with rollup;
+
+-- Revenue by BillingCountry for 2013, biggest first
+-- Expected : USA 85.14, Canada 72.27, France 40.59 ...
+select BillingCountry, sum(Revenue) as Revenue from InvoiceRevenueDaily
+where InvoiceDay >= '2013-01-01' and InvoiceDay < '2014-01-01'
+group by BillingCountry
+order by Revenue desc;
+
+
+/*
+  It's good practice to check a summary against the data it summarises.
+  Check both ways round: summary rows that don't match the invoices, and invoices with
+  no summary row at all (for example, ones inserted before the triggers were created).
+  'with Actual as (...)' names a query so we can use it twice.
+  This should return no rows. If it does, the summary is out of step with the invoices.
+*/
+with Actual as (
+  select date(InvoiceDate) as InvoiceDay, BillingCountry, sum(Total) as Revenue from Invoice
+  group by date(InvoiceDate), BillingCountry
+)
+select 'Summary' as Found, Daily.InvoiceDay, Daily.BillingCountry, Daily.Revenue, Actual.Revenue from InvoiceRevenueDaily Daily
+left join Actual on Daily.InvoiceDay = Actual.InvoiceDay and Daily.BillingCountry = Actual.BillingCountry
+where Daily.Revenue <> coalesce(Actual.Revenue, 0)
+union all
+select 'Invoices', Actual.InvoiceDay, Actual.BillingCountry, null, Actual.Revenue from Actual
+left join InvoiceRevenueDaily Daily on Daily.InvoiceDay = Actual.InvoiceDay and Daily.BillingCountry = Actual.BillingCountry
+where Daily.InvoiceDay is null;
+
+
+
+-- KEEPING COUNTS UP TO DATE WITH SQL
+/*
+  Remember the three questions from the end of the JOINS lesson?
+
+        Which genre has the most tracks?
+        Which Artist has sold the most tracks?
+        Which Artist has recorded in the most genres?
+
+  And one more: how many different customers have bought each track?
+
+  With GROUP BY we can now answer them, but each answer joins InvoiceLine, Track, Album and Artist
+  and groups every row, every time we ask. If a dashboard asks the same question every few seconds,
+  that's a lot of repeated work.
+
+  Instead, we can keep small counting tables, and use triggers to add to them as rows are inserted.
+  Asking the question then means reading a handful of rows from an already counted table.
+
+  NOTE: Very large systems sometimes use 'sketches' here, which give approximate answers with a
+  known error. Our counting tables are small enough to be exact, so the error is always 0.
+*/
+
+-- Drop the counting tables if they are already there
+Drop table if exists TrackSales;
+Drop table if exists ArtistSales;
+Drop table if exists ArtistGenre;
+Drop table if exists TrackCustomers;
+Drop table if exists GenreTracks;
+
+CREATE TABLE TrackSales
+(
+    TrackId INTEGER NOT NULL,
+    TracksSold INTEGER NOT NULL,
+    CONSTRAINT PK_TrackSales PRIMARY KEY  (TrackId)
+);
+
+CREATE TABLE ArtistSales
+(
+    ArtistId INTEGER NOT NULL,
+    TracksSold INTEGER NOT NULL,
+    CONSTRAINT PK_ArtistSales PRIMARY KEY  (ArtistId)
+);
+
+-- One row for each Genre an Artist has recorded in.
+-- Counting the rows for an Artist gives the number of distinct genres.
+CREATE TABLE ArtistGenre
+(
+    ArtistId INTEGER NOT NULL,
+    GenreId INTEGER NOT NULL,
+    Tracks INTEGER NOT NULL,
+    CONSTRAINT PK_ArtistGenre PRIMARY KEY  (ArtistId, GenreId)
+);
+
+-- One row for each Customer who has bought a Track, the same idea as ArtistGenre.
+CREATE TABLE TrackCustomers
+(
+    TrackId INTEGER NOT NULL,
+    CustomerId INTEGER NOT NULL,
+    Purchases INTEGER NOT NULL,
+    CONSTRAINT PK_TrackCustomers PRIMARY KEY  (TrackId, CustomerId)
+);
+
+CREATE TABLE GenreTracks
+(
+    GenreId INTEGER NOT NULL,
+    Tracks INTEGER NOT NULL,
+    CONSTRAINT PK_GenreTracks PRIMARY KEY  (GenreId)
+);
+
+
+-- Fill the tables from the data we already have
+-- Expected : 1984 rows
+insert into TrackSales (TrackId, TracksSold)
+select TrackId, sum(Quantity) from InvoiceLine
+group by TrackId;
+
+-- Expected : 165 rows
+insert into ArtistSales (ArtistId, TracksSold)
+select Album.ArtistId, sum(InvoiceLine.Quantity) from InvoiceLine
+join Track on InvoiceLine.TrackId = Track.TrackId
+join Album on Track.AlbumId = Album.AlbumId
+group by Album.ArtistId;
+
+-- Expected : 233 rows
+insert into ArtistGenre (ArtistId, GenreId, Tracks)
+select Album.ArtistId, Track.GenreId, count(*) from Track
+join Album on Track.AlbumId = Album.AlbumId
+where Track.GenreId is not null
+group by Album.ArtistId, Track.GenreId;
+
+-- Expected : 2240 rows
+insert into TrackCustomers (TrackId, CustomerId, Purchases)
+select InvoiceLine.TrackId, Invoice.CustomerId, count(*) from InvoiceLine
+join Invoice on InvoiceLine.InvoiceId = Invoice.InvoiceId
+group by InvoiceLine.TrackId, Invoice.CustomerId;
+
+-- Expected : 25 rows
+insert into GenreTracks (GenreId, Tracks)
+select GenreId, count(*) from Track
+where GenreId is not null
+group by GenreId;
+
+
+/*
+  Now the triggers. Every new InvoiceLine adds its Quantity to the Track and the Artist,
+  and adds its Customer to the Track's list of customers. Every new Track adds to its Genre, and to its Artist's list of genres.
+  'insert ... select' lets the trigger look up the ArtistId through the Album table.
+  The select is wrapped up and named 'Added', so 'on duplicate key update' can add its values
+  to the existing row.
+*/
+Drop trigger if exists TR_InvoiceLine_TrackSales;
+Drop trigger if exists TR_InvoiceLine_ArtistSales;
+Drop trigger if exists TR_InvoiceLine_TrackCustomers;
+Drop trigger if exists TR_Track_ArtistGenre;
+Drop trigger if exists TR_Track_GenreTracks;
+
+create trigger TR_InvoiceLine_TrackSales after insert on InvoiceLine for each row
+  insert into TrackSales (TrackId, TracksSold)
+  values (NEW.TrackId, NEW.Quantity) as Added
+  on duplicate key update TracksSold = TrackSales.TracksSold + Added.TracksSold;
+
+create trigger TR_InvoiceLine_ArtistSales after insert on InvoiceLine for each row
+  insert into ArtistSales (ArtistId, TracksSold)
+  select * from (
+    select Album.ArtistId, NEW.Quantity as TracksSold from Track
+    join Album on Track.AlbumId = Album.AlbumId
+    where Track.TrackId = NEW.TrackId
+  ) as Added
+  on duplicate key update TracksSold = ArtistSales.TracksSold + Added.TracksSold;
+
+create trigger TR_InvoiceLine_TrackCustomers after insert on InvoiceLine for each row
+  insert into TrackCustomers (TrackId, CustomerId, Purchases)
+  select * from (
+    select NEW.TrackId as TrackId, Invoice.CustomerId, 1 as Purchases from Invoice
+    where Invoice.InvoiceId = NEW.InvoiceId
+  ) as Added
+  on duplicate key update Purchases = TrackCustomers.Purchases + Added.Purchases;
+
+create trigger TR_Track_ArtistGenre after insert on Track for each row
+  insert into ArtistGenre (ArtistId, GenreId, Tracks)
+  select * from (
+    select Album.ArtistId, NEW.GenreId as GenreId, 1 as Tracks from Album
+    where Album.AlbumId = NEW.AlbumId and NEW.GenreId is not null
+  ) as Added
+  on duplicate key update Tracks = ArtistGenre.Tracks + Added.Tracks;
+
+create trigger TR_Track_GenreTracks after insert on Track for each row
+  insert into GenreTracks (GenreId, Tracks)
+  select * from (
+    select NEW.GenreId as GenreId, 1 as Tracks from dual
+    where NEW.GenreId is not null
+  ) as Added
+  on duplicate key update Tracks = GenreTracks.Tracks + Added.Tracks;
+
+
+-- Which genre has the most tracks?
+-- Expected : Rock 1297
+select Genre.Name, GenreTracks.Tracks from GenreTracks
+join Genre on GenreTracks.GenreId = Genre.GenreId
+order by GenreTracks.Tracks desc
+limit 1;
+
+-- Which Artist has sold the most tracks?
+-- Expected : Iron Maiden 140, U2 107, Metallica 91
+select Artist.Name, ArtistSales.TracksSold from ArtistSales
+join Artist on ArtistSales.ArtistId = Artist.ArtistId
+order by ArtistSales.TracksSold desc
+limit 3;
+
+-- Which Artist has recorded in the most genres?
+-- Expected : Iron Maiden 4 (then 6 artists with 3)
+select Artist.Name, count(*) as Genres from ArtistGenre
+join Artist on ArtistGenre.ArtistId = Artist.ArtistId
+group by ArtistGenre.ArtistId
+order by Genres desc
+limit 7;
+
+-- How many different customers have bought each track? Most first.
+-- Expected : 256 tracks with 2 customers, the rest with 1
+select Track.Name, count(*) as Customers from TrackCustomers
+join Track on TrackCustomers.TrackId = Track.TrackId
+group by TrackCustomers.TrackId
+order by Customers desc
+limit 10;
+
+-- Which tracks have sold the most?
+select Track.Name, TrackSales.TracksSold from TrackSales
+join Track on TrackSales.TrackId = Track.TrackId
+order by TrackSales.TracksSold desc
+limit 10;
+
+
+/*
+  Check the counts against the real data, both ways round: counts that don't match,
+  and artists with sales but no count at all. This should return no rows.
+  NOTE: These triggers only count inserts. If you delete or update tracks or invoice lines
+  (as we do in the DELETING lesson), empty the tables and re-run the 'Fill' statements above.
+*/
+with Actual as (
+  select Album.ArtistId, sum(InvoiceLine.Quantity) as TracksSold from InvoiceLine
+  join Track on InvoiceLine.TrackId = Track.TrackId
+  join Album on Track.AlbumId = Album.AlbumId
+  group by Album.ArtistId
+)
+select 'Counted' as Found, ArtistSales.ArtistId, ArtistSales.TracksSold, Actual.TracksSold from ArtistSales
+left join Actual on ArtistSales.ArtistId = Actual.ArtistId
+where ArtistSales.TracksSold <> coalesce(Actual.TracksSold, 0)
+union all
+select 'Sales', Actual.ArtistId, null, Actual.TracksSold from Actual
+left join ArtistSales on ArtistSales.ArtistId = Actual.ArtistId
+where ArtistSales.ArtistId is null;
+
+
+
+-- WORKING WITH MONEY IN SQL
+/*
+  In our MySQL database, UnitPrice and Total are NUMERIC(10,2), which MySQL stores as an exact
+  DECIMAL. So sum(UnitPrice * Quantity) is already exact here, with no rounding errors.
+  (The long 5.651941747572825 in the AGGREGATING lesson came from a database that stores these
+  columns as floating point numbers. Floating point can't hold 0.99 exactly, and that's where
+  rounding errors come from.)
+
+  Another common way to handle money is to count it in whole cents, as integers.
+  Integers are exact in every database, so the same queries work unchanged anywhere.
+  And adding up integers is quicker than adding up DECIMALs, which matters on big tables.
+
+  We don't want to change the existing UnitPrice and Total columns, because every lesson uses them.
+  Instead we add 'generated' columns. The database calculates them from the original column,
+  stores them, and keeps them up to date whenever the original is inserted or updated.
+*/
+
+-- These will throw an error if the columns already exist (if you run this lesson twice). That's ok.
+alter table Track
+  add column UnitPriceCents INTEGER as (cast(UnitPrice * 100 as signed)) stored not null;
+
+alter table InvoiceLine
+  add column UnitPriceCents INTEGER as (cast(UnitPrice * 100 as signed)) stored not null;
+
+alter table Invoice
+  add column TotalCents INTEGER as (cast(Total * 100 as signed)) stored not null;
+
+
+-- Expected : 0.99   99
+select UnitPrice, UnitPriceCents from Track where TrackId = 1;
+
+
+-- The total value of all invoices, in cents
+-- Expected : 232860
+select sum(TotalCents) from Invoice;
+
+-- The average invoice, in cents. 'div' is integer division.
+-- It throws away the fraction rather than rounding, so 565.9 cents would become 565.
+-- Expected : 565 (the exact answer is 565.19...)
+select sum(TotalCents) div count(*) from Invoice;
+
+-- To round to the nearest cent instead, add half the divisor before dividing.
+-- Expected : 565
+select (sum(TotalCents) + count(*) div 2) div count(*) from Invoice;
+
+-- Convert back to dollars only when showing the result.
+-- Expected : 5.6500
+select (sum(TotalCents) + count(*) div 2) div count(*) / 100 from Invoice;
+
+
+-- The total for Invoice 2, from its lines
+-- Expected : 396
+select sum(UnitPriceCents * Quantity) from InvoiceLine
+where InvoiceId = 2;
+
+-- The total cost of each album, in cents
+select Album.Title, sum(Track.UnitPriceCents) as AlbumCents from Track
+  join Album on Track.AlbumId = Album.AlbumId
+group by Track.AlbumId;
+
+
+/*
+  Integer cents are exact, so we can check every Invoice Total against its lines,
+  and expect them to match to the cent.
+  Expected : 0 rows
+*/
+select Invoice.InvoiceId, Invoice.TotalCents, sum(InvoiceLine.UnitPriceCents * InvoiceLine.Quantity) as LineCents
+from Invoice
+join InvoiceLine on Invoice.InvoiceId = InvoiceLine.InvoiceId
+group by Invoice.InvoiceId, Invoice.TotalCents
+having Invoice.TotalCents <> LineCents;
+
+
+/*
+  NOTE: 'select * from Track' now includes the UnitPriceCents column.
+  Inserts that list their columns, like the ones in the INSERTING lesson, don't need to change.
+  You can't set a generated column yourself, the database always calculates it.
+*/
+
+
+
+-- PLAYLIST QUESTIONS WITH INDEXES
+/*
+  PlaylistTrack is the biggest table in the database (8715 rows), but there are only 18 playlists.
+  Most questions we ask about it are about sets of tracks:
+    Is this track on this playlist?
+    How many tracks are on this playlist?
+    Which tracks are on both of these playlists? On either of them?
+    Which playlists is this track on?
+
+  The primary key of PlaylistTrack is (PlaylistId, TrackId). The key is also an index, so the
+  database keeps the TrackIds for each playlist together, in order. That's a ready made 'set' of
+  tracks for each playlist. IFK_PlaylistTrackTrackId is the same thing the other way around,
+  the set of playlists for each track.
+
+  If we write the queries so they only need those two indexes, none of them has to read the
+  whole table. Put 'explain' in front of each query, you should see 'Using index' in the Extra column.
+*/
+
+-- Is Track 52 on the Grunge playlist (16)?
+-- Expected : 1 row
+select 1 from PlaylistTrack
+where PlaylistId = 16 and TrackId = 52;
+
+-- Which playlists is Track 52 on?
+-- Expected : 1, 5, 8, 16
+select PlaylistId from PlaylistTrack
+where TrackId = 52;
+
+-- Which tracks are on both 'Music' (1) and '90’s Music' (5)?
+-- Expected : 1477 rows
+select A.TrackId from PlaylistTrack A
+join PlaylistTrack B on A.TrackId = B.TrackId
+where A.PlaylistId = 1 and B.PlaylistId = 5;
+
+-- Which tracks are on either 'Grunge' (16) or 'Heavy Metal Classic' (17)?
+-- 'union' removes the duplicates, so each track appears once
+-- Expected : 41 rows
+select TrackId from PlaylistTrack where PlaylistId = 16
+union
+select TrackId from PlaylistTrack where PlaylistId = 17;
+
+
+/*
+  How many tracks are on each playlist?
+  We could count them every time, but it's cheaper to keep the count up to date with triggers.
+  Playlists with no tracks still get a row, with 0 tracks.
+*/
+Drop table if exists PlaylistSize;
+
+CREATE TABLE PlaylistSize
+(
+    PlaylistId INTEGER NOT NULL,
+    Tracks INTEGER NOT NULL,
+    CONSTRAINT PK_PlaylistSize PRIMARY KEY  (PlaylistId)
+);
+
+-- Expected : 18 rows
+insert into PlaylistSize (PlaylistId, Tracks)
+select Playlist.PlaylistId, count(PlaylistTrack.TrackId) from Playlist
+left join PlaylistTrack on Playlist.PlaylistId = PlaylistTrack.PlaylistId
+group by Playlist.PlaylistId;
+
+Drop trigger if exists TR_PlaylistTrack_SizeInsert;
+Drop trigger if exists TR_PlaylistTrack_SizeDelete;
+
+create trigger TR_PlaylistTrack_SizeInsert after insert on PlaylistTrack for each row
+  insert into PlaylistSize (PlaylistId, Tracks)
+  values (NEW.PlaylistId, 1) as Added
+  on duplicate key update Tracks = PlaylistSize.Tracks + Added.Tracks;
+
+create trigger TR_PlaylistTrack_SizeDelete after delete on PlaylistTrack for each row
+  update PlaylistSize set Tracks = Tracks - 1
+  where PlaylistId = OLD.PlaylistId;
+
+
+-- Which playlists are empty?
+-- No join to PlaylistTrack, no group by, just a lookup.
+-- Expected : 4 rows (Movies, Audiobooks, Audiobooks, Movies)
+select Playlist.Name, PlaylistSize.Tracks from PlaylistSize
+join Playlist on PlaylistSize.PlaylistId = Playlist.PlaylistId
+where PlaylistSize.Tracks = 0;
+
+-- TRY THIS: Once you've done GOLD challenge 7 in the JOINS lesson the hard way,
+-- change the query above to find a playlist that contains only 1 track.
+
+
+-- Check the counts against the real data, both ways round: counts that don't match,
+-- and playlists with tracks but no count at all. This should return no rows.
+select PlaylistSize.PlaylistId, PlaylistSize.Tracks, count(PlaylistTrack.TrackId) from PlaylistSize
+left join PlaylistTrack on PlaylistSize.PlaylistId = PlaylistTrack.PlaylistId
+group by PlaylistSize.PlaylistId, PlaylistSize.Tracks
+having PlaylistSize.Tracks <> count(PlaylistTrack.TrackId)
+union all
+select PlaylistTrack.PlaylistId, null, count(*) from PlaylistTrack
+left join PlaylistSize on PlaylistSize.PlaylistId = PlaylistTrack.PlaylistId
+where PlaylistSize.PlaylistId is null
+group by PlaylistTrack.PlaylistId;
+
+
+
+-- LOOKUP TABLES WITH SQL
+/*
+  Some columns repeat the same few values over and over.
+  Customer.Country and Invoice.BillingCountry only ever hold 24 different countries,
+  but the name is stored again in every row, and every filter like Country = 'USA'
+  compares text, row by row.
+
+  We can move the names into a lookup table, give each one a number, and store the number instead.
+  A filter then finds the name once in the lookup table, and compares numbers from there on.
+  Numbers are smaller to store and quicker to compare than text.
+
+  This is the same idea as the GenreId and MediaTypeId columns in the Track table.
+*/
+
+/*
+  Drop the triggers (created further down) first. If you run this lesson a second time,
+  the old 'before update' triggers would otherwise run during the 'update ... join Country'
+  statements below, and MySQL won't let a trigger insert into a table the statement is reading.
+*/
+Drop trigger if exists TR_Customer_CountryAdd;
+Drop trigger if exists TR_Customer_CountryId;
+Drop trigger if exists TR_Customer_CountryAddUpdate;
+Drop trigger if exists TR_Customer_CountryIdUpdate;
+Drop trigger if exists TR_Invoice_CountryAdd;
+Drop trigger if exists TR_Invoice_CountryId;
+Drop trigger if exists TR_Invoice_CountryAddUpdate;
+Drop trigger if exists TR_Invoice_CountryIdUpdate;
+Drop trigger if exists TR_Track_ComposerAdd;
+Drop trigger if exists TR_Track_ComposerId;
+Drop trigger if exists TR_Track_ComposerAddUpdate;
+Drop trigger if exists TR_Track_ComposerIdUpdate;
+
+Drop table if exists Country;
+
+-- The UNIQUE constraint stops the same country being added twice
+CREATE TABLE Country
+(
+    CountryId INT NOT NULL AUTO_INCREMENT,
+    Name NVARCHAR(40) NOT NULL,
+    CONSTRAINT PK_Country PRIMARY KEY  (CountryId),
+    CONSTRAINT UK_CountryName UNIQUE  (Name)
+);
+
+-- Every country used by a Customer or an Invoice
+-- Expected : 24 rows
+insert into Country (Name)
+select Country from Customer where Country is not null
+union
+select BillingCountry from Invoice where BillingCountry is not null;
+
+
+-- Add the number to Customer and Invoice, fill it in, and index it
+-- The 'alter table' and 'create index' statements will throw an error if you run this lesson twice. That's ok.
+alter table Customer add column CountryId INTEGER;
+alter table Invoice add column BillingCountryId INTEGER;
+
+update Customer join Country on Customer.Country = Country.Name
+set Customer.CountryId = Country.CountryId;
+
+update Invoice join Country on Invoice.BillingCountry = Country.Name
+set Invoice.BillingCountryId = Country.CountryId;
+
+create index IFK_CustomerCountryId on Customer (CountryId);
+create index IFK_InvoiceBillingCountryId on Invoice (BillingCountryId);
+
+
+/*
+  New rows need their number too. Two 'before insert' triggers on each table do this:
+  the first adds the country to the lookup table if it's new ('insert ignore' skips it if it's
+  already there), the second ('follows' the first) looks up the number and sets it on the new row.
+
+  Updates need the same pair of triggers. Otherwise 'update Customer set Country = ...' would leave
+  the old CountryId behind, and the filters below would quietly return the wrong customers.
+*/
+create trigger TR_Customer_CountryAdd before insert on Customer for each row
+  insert ignore into Country (Name) select NEW.Country from dual where NEW.Country is not null;
+
+create trigger TR_Customer_CountryId before insert on Customer for each row follows TR_Customer_CountryAdd
+  set NEW.CountryId = (select CountryId from Country where Name = NEW.Country);
+
+create trigger TR_Customer_CountryAddUpdate before update on Customer for each row
+  insert ignore into Country (Name) select NEW.Country from dual where NEW.Country is not null;
+
+create trigger TR_Customer_CountryIdUpdate before update on Customer for each row follows TR_Customer_CountryAddUpdate
+  set NEW.CountryId = (select CountryId from Country where Name = NEW.Country);
+
+create trigger TR_Invoice_CountryAdd before insert on Invoice for each row
+  insert ignore into Country (Name) select NEW.BillingCountry from dual where NEW.BillingCountry is not null;
+
+create trigger TR_Invoice_CountryId before insert on Invoice for each row follows TR_Invoice_CountryAdd
+  set NEW.BillingCountryId = (select CountryId from Country where Name = NEW.BillingCountry);
+
+create trigger TR_Invoice_CountryAddUpdate before update on Invoice for each row
+  insert ignore into Country (Name) select NEW.BillingCountry from dual where NEW.BillingCountry is not null;
+
+create trigger TR_Invoice_CountryIdUpdate before update on Invoice for each row follows TR_Invoice_CountryAddUpdate
+  set NEW.BillingCountryId = (select CountryId from Country where Name = NEW.BillingCountry);
+
+
+-- Customers in the USA or Canada.
+-- The names are looked up once in Country, then Customer is searched by number, through the index.
+-- Expected : 21 rows
+select Customer.* from Customer
+where Customer.CountryId in (select CountryId from Country where Name in ('USA', 'Canada'));
+
+-- The same thing, written as a join
+-- Expected : 21 rows
+select Customer.* from Country
+join Customer on Country.CountryId = Customer.CountryId
+where Country.Name in ('USA', 'Canada');
+
+-- Invoices billed to Germany
+-- Expected : 28 rows
+select Invoice.* from Country
+join Invoice on Country.CountryId = Invoice.BillingCountryId
+where Country.Name = 'Germany';
+
+
+/*
+  The same steps work for Track.Composer. There are 852 different composers across 3503 tracks,
+  and lessons often filter on one, like Composer = 'U2' in the very first lesson.
+  Composer can be empty (NULL), and those tracks are left with a NULL ComposerId.
+*/
+Drop table if exists Composer;
+
+CREATE TABLE Composer
+(
+    ComposerId INT NOT NULL AUTO_INCREMENT,
+    Name NVARCHAR(220) NOT NULL,
+    CONSTRAINT PK_Composer PRIMARY KEY  (ComposerId),
+    CONSTRAINT UK_ComposerName UNIQUE  (Name)
+);
+
+-- Expected : 851 rows
+-- (There are 852 spellings, but MySQL's default collation ignores accents when comparing,
+--  so 'Lazão' and 'Lazao' count as the same composer.)
+insert into Composer (Name)
+select distinct Composer from Track where Composer is not null;
+
+-- These will throw an error if you run this lesson twice. That's ok.
+alter table Track add column ComposerId INTEGER;
+
+update Track join Composer on Track.Composer = Composer.Name
+set Track.ComposerId = Composer.ComposerId;
+
+create index IFK_TrackComposerId on Track (ComposerId);
+
+create trigger TR_Track_ComposerAdd before insert on Track for each row
+  insert ignore into Composer (Name) select NEW.Composer from dual where NEW.Composer is not null;
+
+create trigger TR_Track_ComposerId before insert on Track for each row follows TR_Track_ComposerAdd
+  set NEW.ComposerId = (select ComposerId from Composer where Name = NEW.Composer);
+
+create trigger TR_Track_ComposerAddUpdate before update on Track for each row
+  insert ignore into Composer (Name) select NEW.Composer from dual where NEW.Composer is not null;
+
+create trigger TR_Track_ComposerIdUpdate before update on Track for each row follows TR_Track_ComposerAddUpdate
+  set NEW.ComposerId = (select ComposerId from Composer where Name = NEW.Composer);
+
+
+-- Tracks by U2
+-- Expected : 44 rows
+select Track.* from Composer
+join Track on Composer.ComposerId = Track.ComposerId
+where Composer.Name = 'U2';
+
+
+/*
+  Check that every number matches its name. This should return no rows.
+  '<=>' is an equals that treats two NULLs as equal, so a NULL Composer with a NULL ComposerId passes.
+
+  We've kept the original Country, BillingCountry and Composer columns so the earlier lessons still work.
+*/
+select 'Customer' as TableName, Customer.CustomerId as RowId, Customer.Country as Value, Country.Name from Customer
+left join Country on Customer.CountryId = Country.CountryId
+where not (Customer.Country <=> Country.Name)
+union all
+select 'Invoice', Invoice.InvoiceId, Invoice.BillingCountry, Country.Name from Invoice
+left join Country on Invoice.BillingCountryId = Country.CountryId
+where not (Invoice.BillingCountry <=> Country.Name)
+union all
+select 'Track', Track.TrackId, Track.Composer, Composer.Name from Track
+left join Composer on Track.ComposerId = Composer.ComposerId
+where not (Track.Composer <=> Composer.Name);
+
+
+/*
+  CHALLENGE
+  ---------
+  Follow the same steps for Employee.Title, then find the 'IT Staff' using the lookup table.
+  Expected : 2 rows (Robert King and Laura Callahan)
+
+  Then try Customer.City, and count the customers in 'Berlin'.
+  Expected : 2
+*/
+
+
+
+-- REWRITING QUERIES WITH SQL
+/*
+  There is usually more than one way to write a query that gives the same results.
+  Some rewrites make a query easier to read, and some make it less work for the database.
+  Here are some rewrites that give the same results, as long as the conditions given for each
+  one are true, using queries from the earlier lessons.
+
+  To see what a query costs, put 'explain analyze' in front of it. MySQL runs the query and
+  shows each step it took, how many rows that step read, and how long it took ('actual time').
+  Run the 'before' and 'after' versions of each rewrite and compare the plans.
+*/
+
+
+/*
+  1. OR chains become IN lists.
+     A chain of ORs on the same column means the same as an IN list, and IN is shorter to read.
+     This one is for people, not the database. MySQL already treats the two the same way,
+     so 'explain analyze' shows the same plan for both.
+     Expected : 8 rows (both queries)
+*/
+-- Before
+select * from Customer
+where Country = 'United Kingdom' or Country = 'Spain' or Country = 'Germany';
+
+-- After
+select * from Customer
+where Country in ('United Kingdom', 'Spain', 'Germany');
+
+
+/*
+  2. UNION becomes UNION ALL when there are no duplicates to remove.
+     'union' has to remove duplicate rows, which means collecting and comparing every row.
+     'union all' skips that step. That is only safe when both of these are true:
+       a. the two halves can't return the same row, and
+       b. neither half returns the same row twice on its own. 'union' removes those too.
+
+     In the 'Continent' query at the end of the DELETING lesson, a customer can't be in the USA
+     and in Spain at the same time, so (a) is true. Each half selects Customer.*, which includes
+     the CustomerId primary key, so every row in a half is different, and (b) is true.
+
+     Be careful: 'select Country from Customer where ... union ...' fails (b). There are 13
+     customers in the USA, and 'union all' would list 'USA' 13 times where 'union' lists it once.
+     Expected : 29 rows (both queries)
+*/
+-- Before
+select 'America' as Continent, Customer.* from Customer where Country = 'USA' or Country = 'Canada'
+union
+select 'Europe' as Continent, Customer.* from Customer where Country = 'United Kingdom' or Country = 'Spain' or Country = 'Germany';
+
+-- After
+select 'America' as Continent, Customer.* from Customer where Country in ('USA', 'Canada')
+union all
+select 'Europe' as Continent, Customer.* from Customer where Country in ('United Kingdom', 'Spain', 'Germany');
+
+
+/*
+  3. Two scans become one, with CASE.
+     Both halves of the union above still read the Customer table.
+     A CASE expression can work out the Continent for each row, so the table is only read once.
+     Expected : 29 rows
+*/
+select
+  case
+    when Country in ('USA', 'Canada') then 'America'
+    else 'Europe'
+  end as Continent,
+  Customer.*
+from Customer
+where Country in ('USA', 'Canada', 'United Kingdom', 'Spain', 'Germany');
+
+
+/*
+  4. IN (subquery) becomes a join.
+     The last DELETING example finds the tracks to delete with a subquery.
+     Joining Track to Album says the same thing, starting from the Album row titled "Boy"
+     and using the IFK_TrackAlbumId index to find its tracks.
+     This is safe because AlbumId is the primary key of Album, so the join can't match a track twice.
+
+     Like rewrite 1, this is about showing that two queries are the same, not about speed.
+     MySQL already turns 'in (subquery)' into a join (a 'semi-join') by itself, for SELECTs and,
+     since MySQL 8.0.21, for single table DELETEs too. 'explain analyze' shows the same plan for both.
+
+     As always, check the SELECT first.
+     Expected : the same rows from both queries
+*/
+-- Before
+select * from Track
+where Track.AlbumId in (select Album.AlbumId from Album where Title = "Boy");
+
+-- After
+select Track.* from Track
+join Album on Track.AlbumId = Album.AlbumId
+where Album.Title = "Boy";
+
+-- The same rewrite for the DELETE. Name the table to delete from after 'delete'.
+delete Track from Track
+join Album on Track.AlbumId = Album.AlbumId
+where Album.Title = "Boy";
+
+
+/*
+  CHALLENGE
+  ---------
+  Run 'explain analyze' on the before and after versions of each rewrite above,
+  and make a note of the 'actual time' for each. Which rewrites changed the plan?
+  Which made the biggest difference?
+  NOTE: The Chinook tables are small, so some differences will be tiny. They grow with the data.
+*/
+
+
+
+-- PAGING THROUGH RESULTS WITH SQL
+/*
+  A website rarely shows all 347 albums at once. It shows a page of them, say 10 at a time.
+  The obvious way to do that is with LIMIT and OFFSET:
+*/
+
+-- Page 1
+select * from Album
+order by ArtistId, Title
+limit 10;
+
+-- Page 2 skips the first 10 rows
+select * from Album
+order by ArtistId, Title
+limit 10 offset 10;
+
+/*
+  This works, but the database still has to find and sort the rows it skips.
+  Page 30 reads 300 rows just to throw them away. And if a new album is inserted while someone
+  is paging, every later row moves along by one, so they either see a row twice or miss one.
+
+  A better way is to remember where the last page ended (the 'key' of the last row),
+  and ask for the rows that come after it. This is called keyset paging.
+
+    1. The ORDER BY must identify each row uniquely, so we add the primary key (AlbumId) as the
+       final tie breaker.
+    2. An index on exactly those columns, in the same order, lets the database jump straight to
+       the start of the next page.
+*/
+
+-- These will throw an error if the indexes already exist (if you run this lesson twice). That's ok.
+create index IX_AlbumArtistTitle on Album (ArtistId, Title, AlbumId);
+create index IX_AlbumTitle on Album (Title, AlbumId);
+
+
+-- Page 1. Same as before, with AlbumId added as the tie breaker
+-- Expected : 10 rows, the last is AlbumId 9, ArtistId 7, 'Plays Metallica By Four Cellos'
+select AlbumId, ArtistId, Title from Album
+order by ArtistId, Title, AlbumId
+limit 10;
+
+/*
+  The application keeps the last row's (ArtistId, Title, AlbumId) as the bookmark for the next page.
+  Here we use MySQL variables to hold it.
+
+  We want 'every row that sorts after the bookmark'. Sorting compares ArtistId first,
+  then Title when the ArtistIds are equal, then AlbumId when the Titles are equal too.
+  The WHERE clause says exactly that:
+    a bigger ArtistId,
+    or the same ArtistId and a bigger Title,
+    or the same ArtistId and Title and a bigger AlbumId.
+
+  NOTE: MySQL also accepts the shorter (ArtistId, Title, AlbumId) > (7, '...', 9), and it gives the
+  same rows. But MySQL can't use it to jump into the index, so it reads the index from the start
+  and throws rows away until it has 10, which costs as much as OFFSET. Use the long form.
+*/
+set @LastArtistId = 7, @LastTitle = 'Plays Metallica By Four Cellos', @LastAlbumId = 9;
+
+-- Page 2
+-- Expected : 10 rows, starting with AlbumId 10, 'Audioslave'
+select AlbumId, ArtistId, Title from Album
+where ArtistId > @LastArtistId
+   or (ArtistId = @LastArtistId and (Title > @LastTitle
+       or (Title = @LastTitle and AlbumId > @LastAlbumId)))
+order by ArtistId, Title, AlbumId
+limit 10;
+
+/*
+  See the difference with 'explain analyze'.
+  The keyset query should show an 'Index range scan on Album using IX_AlbumArtistTitle',
+  and read only about 10 rows (the 'rows=' figure in 'actual ...').
+  The OFFSET query reads every row it skips: about 300 rows for page 30.
+  Change @LastArtistId to a bigger number, like 200, and run the keyset one again.
+  It still reads about 10 rows.
+*/
+explain analyze
+select AlbumId, ArtistId, Title from Album
+where ArtistId > @LastArtistId
+   or (ArtistId = @LastArtistId and (Title > @LastTitle
+       or (Title = @LastTitle and AlbumId > @LastAlbumId)))
+order by ArtistId, Title, AlbumId
+limit 10;
+
+explain analyze
+select AlbumId, ArtistId, Title from Album
+order by ArtistId, Title, AlbumId
+limit 10 offset 290;
+
+/*
+  Every page is found the same way, so page 30 costs the same as page 2.
+  Albums inserted in the meantime only show up where they belong in the order,
+  they never shift the rows on the page you are about to read.
+*/
+
+
+-- Albums by Title works the same way. Remember the Title and AlbumId of the last row.
+-- Expected : 10 rows, the last is AlbumId 160, 'Ace Of Spades'
+select AlbumId, Title from Album
+order by Title, AlbumId
+limit 10;
+
+set @LastTitle = 'Ace Of Spades', @LastAlbumId = 160;
+
+-- Expected : 10 rows, starting with AlbumId 232, 'Achtung Baby'
+select AlbumId, Title from Album
+where Title > @LastTitle
+   or (Title = @LastTitle and AlbumId > @LastAlbumId)
+order by Title, AlbumId
+limit 10;
+
+
+/*
+  Newest Invoices first. IX_InvoiceDate from the REPORTING BY DATE lesson already
+  includes InvoiceId (every index quietly stores the primary key), so it can be used here.
+  For a descending order, ask for the rows that come before the bookmark:
+  an earlier date, or the same date and a smaller InvoiceId.
+*/
+-- Expected : 10 rows, the last is InvoiceId 403, 2013-11-08 00:00:00
+select InvoiceId, InvoiceDate, BillingCity, Total from Invoice
+order by InvoiceDate desc, InvoiceId desc
+limit 10;
+
+set @LastInvoiceDate = '2013-11-08 00:00:00', @LastInvoiceId = 403;
+
+-- Expected : 10 rows, starting with InvoiceId 402, 2013-11-05 00:00:00
+select InvoiceId, InvoiceDate, BillingCity, Total from Invoice
+where InvoiceDate < @LastInvoiceDate
+   or (InvoiceDate = @LastInvoiceDate and InvoiceId < @LastInvoiceId)
+order by InvoiceDate desc, InvoiceId desc
+limit 10;
+
+-- Expected : an index range scan (in reverse) on Invoice using IX_InvoiceDate, reading about 10 rows
+explain analyze
+select InvoiceId, InvoiceDate, BillingCity, Total from Invoice
+where InvoiceDate < @LastInvoiceDate
+   or (InvoiceDate = @LastInvoiceDate and InvoiceId < @LastInvoiceId)
+order by InvoiceDate desc, InvoiceId desc
+limit 10;
+
+
+/*
+  CHALLENGE
+  ---------
+  Tracks by Album Title, then Track Name (from the ORDERING lesson).
+  Write the keyset version, using (Album.Title, Track.Name, Track.TrackId) as the bookmark.
+  Why can't a single index help with this one?
+*/
+
+
+
+-- CHECKING ANSWERS WITH SQL
+/*
+  How do we know if a query written for one of the challenges is correct?
+  We can run a reference answer once, store a summary of its results, then compare every
+  submitted query against that summary. The summary is:
+    the number of rows, and
+    a checksum, made by turning each row into a number with crc32() and adding them up.
+  Adding means the order of the rows doesn't matter, only their contents.
+
+  NOTE: That also means the checksum does not check the ORDER BY. A submission for an ORDERING
+  challenge with the right rows in the wrong order is still graded 'Correct', so check the
+  order of those by eye.
+
+  concat_ws() skips NULL values, which would make (NULL, 'x') and ('x', NULL) look the same.
+  So each column is wrapped in coalesce(..., '\\N') first, which swaps a NULL for the text \N.
+
+  We also want to protect the database from mistakes. A join that is missing its ON clause
+  joins every row to every row. Track joined to Genre without ON is 3503 x 25 = 87575 rows,
+  and with a few more tables it can run for a very long time.
+*/
+
+Drop table if exists ChallengeAnswer;
+
+CREATE TABLE ChallengeAnswer
+(
+    ChallengeId NVARCHAR(20) NOT NULL,
+    Description NVARCHAR(200) NOT NULL,
+    ExpectedRows INTEGER NOT NULL,
+    Checksum BIGINT NOT NULL,
+    CONSTRAINT PK_ChallengeAnswer PRIMARY KEY  (ChallengeId)
+);
+
+
+/*
+  Store the reference answers.
+  'as Answer (C1, C2)' renames the columns of the query, so the checksum works for any
+  column names or aliases the query uses.
+*/
+insert into ChallengeAnswer (ChallengeId, Description, ExpectedRows, Checksum)
+select 'joins-silver-4', 'Jazz tracks', count(*), sum(crc32(concat_ws('|', coalesce(C1, '\\N'), coalesce(C2, '\\N')))) from (
+  select Track.Name as Track, Genre.Name as Genre from Track
+  join Genre on Track.GenreId = Genre.GenreId
+  where Genre.Name = 'Jazz'
+) as Answer (C1, C2);
+
+insert into ChallengeAnswer (ChallengeId, Description, ExpectedRows, Checksum)
+select 'joins-silver-5', 'Koyaanisqatsi', count(*), sum(crc32(concat_ws('|', coalesce(C1, '\\N'), coalesce(C2, '\\N'), coalesce(C3, '\\N')))) from (
+  select Track.Name as Track, MediaType.Name as MediaType, Genre.Name as Genre from Track
+  join MediaType on Track.MediaTypeId = MediaType.MediaTypeId
+  join Genre on Track.GenreId = Genre.GenreId
+  where MediaType.Name = 'Protected AAC audio file' and Genre.Name = 'Soundtrack'
+) as Answer (C1, C2, C3);
+
+insert into ChallengeAnswer (ChallengeId, Description, ExpectedRows, Checksum)
+select 'ordering-gold-4', 'Top 10 invoices', count(*), sum(crc32(concat_ws('|', coalesce(C1, '\\N'), coalesce(C2, '\\N'), coalesce(C3, '\\N')))) from (
+  select concat(Customer.FirstName, ' ', Customer.LastName), Invoice.InvoiceDate, Invoice.Total from Invoice
+  join Customer on Invoice.CustomerId = Customer.CustomerId
+  order by Invoice.Total desc, Invoice.InvoiceDate desc
+  limit 10
+) as Answer (C1, C2, C3);
+
+-- Expected : 130, 1 and 10 rows
+select * from ChallengeAnswer;
+
+
+/*
+  Before running a submitted query, put some guards in place for this session:
+
+  max_execution_time   stops any SELECT that runs for longer than this many milliseconds
+  max_join_size        refuses to run a query the database estimates will look at more than
+                       this many row combinations. A missing ON clause is caught before it starts.
+  transaction read only  the submitted query can't change any data
+
+  'with consistent snapshot' means every query in the transaction sees the data as it was
+  when the transaction started, even if someone else changes it in the meantime.
+*/
+set session max_execution_time = 2000;
+set session max_join_size = 1000000;
+start transaction with consistent snapshot, read only;
+
+
+-- Grade a submission. Paste the submitted query in the middle.
+-- Expected : Correct
+select
+  case
+    when Submitted.ActualRows = ChallengeAnswer.ExpectedRows
+     and Submitted.ActualChecksum = ChallengeAnswer.Checksum then 'Correct'
+    when Submitted.ActualRows = ChallengeAnswer.ExpectedRows then 'Right number of rows, wrong data'
+    else 'Wrong number of rows'
+  end as Result,
+  Submitted.ActualRows, ChallengeAnswer.ExpectedRows
+from ChallengeAnswer
+join (
+  select count(*) as ActualRows, sum(crc32(concat_ws('|', coalesce(C1, '\\N'), coalesce(C2, '\\N')))) as ActualChecksum from (
+
+    select Track.Name, Genre.Name from Track
+    join Genre on Track.GenreId = Genre.GenreId
+    where Genre.GenreId = 2
+
+  ) as Answer (C1, C2)
+) as Submitted
+where ChallengeAnswer.ChallengeId = 'joins-silver-4';
+
+
+-- A submission with no ON clauses, joining Track, Genre, MediaType and Album.
+-- 3503 x 25 x 5 x 347 is about 150 million rows.
+-- Expected : An error saying the SELECT would examine more than MAX_JOIN_SIZE rows
+select count(*) from Track
+join Genre
+join MediaType
+join Album;
+
+
+-- Finish the read only transaction, and put the session settings back
+commit;
+set session max_execution_time = default;
+set session max_join_size = default;
+
+
+
+-- ESTIMATING ROW COUNTS WITH SQL
+/*
+  Throughout these lessons we've said how many rows to expect before running a query.
+  The database can make the same kind of guess, without running the query.
+  It does this using statistics about the data in each column:
+
+    how many distinct values a column has (its 'cardinality'),
+    and a histogram: the values split into buckets, with how many rows fall in each bucket.
+
+  Indexed columns get their cardinality automatically. For other columns we ask for a histogram.
+*/
+
+analyze table Track update histogram on Milliseconds, Bytes, UnitPrice, Composer with 64 buckets;
+analyze table Invoice update histogram on Total, BillingCountry with 64 buckets;
+analyze table Customer update histogram on Country, City with 64 buckets;
+analyze table Employee update histogram on Title with 16 buckets;
+
+
+-- Look at the statistics that were collected
+select TABLE_NAME, COLUMN_NAME, HISTOGRAM->>'$."histogram-type"' as Type,
+       json_length(HISTOGRAM->'$.buckets') as Buckets
+from information_schema.COLUMN_STATISTICS
+where SCHEMA_NAME = 'Chinook';
+
+-- Columns with only a few values get a 'singleton' histogram, one bucket per value.
+-- These are the most common values, with the fraction of rows that have each one.
+select HISTOGRAM->'$.buckets' from information_schema.COLUMN_STATISTICS
+where SCHEMA_NAME = 'Chinook' and TABLE_NAME = 'Customer' and COLUMN_NAME = 'Country';
+
+-- The distinct values for indexed columns, such as the foreign keys we join on
+select TABLE_NAME, INDEX_NAME, COLUMN_NAME, CARDINALITY from information_schema.STATISTICS
+where TABLE_SCHEMA = 'Chinook'
+order by TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX;
+
+
+/*
+  Now ask for estimates. 'explain' (without 'analyze') does not run the query.
+  The estimated number of rows is 'rows' x 'filtered' / 100.
+  Compare each estimate with the Expected count.
+*/
+
+-- Expected : 44 rows
+explain select * from Track where Composer = 'U2';
+
+-- Expected : 2 rows
+explain select * from Track where Milliseconds > 5000000;
+
+-- Expected : 13 rows
+explain select * from Customer where Country = 'USA';
+
+-- Expected : 130 rows
+explain select Track.Name, Genre.Name from Track
+join Genre on Track.GenreId = Genre.GenreId
+where Genre.Name = 'Jazz';
+
+-- 'format=json' shows the same estimate as a single number, 'rows_produced_per_join'
+explain format=json select * from Track where Milliseconds > 5000000;
+
+
+/*
+  Statistics are a snapshot. They don't change as rows are inserted, updated or deleted.
+  After a big change (like the inserts and deletes in the earlier lessons), refresh them.
+  'analyze table' on its own refreshes the index cardinalities.
+*/
+analyze table Track;
+analyze table Track update histogram on Milliseconds, Bytes, UnitPrice, Composer with 64 buckets;
+
+-- Remove a histogram you no longer want
+analyze table Employee drop histogram on Title;
+
+
+/*
+  CHALLENGE
+  ---------
+  Write a query you expect to return a very large number of rows (try a join with no ON clause).
+  Use explain to see the estimate before you run it.
+  How close is the estimate to the real count?
+*/
+
+
+
+-- RECORDING CHANGES WITH SQL
+/*
+  In the earlier lessons we built tables that summarise other tables, and kept them up to date
+  with triggers. Sometimes the thing that needs to know about a change isn't in the database at all,
+  for example a cache in a website, or a copy of the data somewhere else.
+
+  A change log records every insert, update and delete as a row:
+    a sequence number, so changes can be read back in order,
+    which table and row changed,
+    the row as it was before the change, and as it is after it (as JSON).
+
+  Anyone who needs to follow the changes remembers the last sequence number they read,
+  and next time only reads the changes after it. The work they do depends on how much changed,
+  not on how big the tables are.
+*/
+
+Drop table if exists ChangeLog;
+Drop table if exists ChangeSubscriber;
+
+CREATE TABLE ChangeLog
+(
+    ChangeSeq BIGINT NOT NULL AUTO_INCREMENT,
+    TableName NVARCHAR(64) NOT NULL,
+    Operation CHAR(1) NOT NULL,
+    RowId INTEGER NOT NULL,
+    BeforeImage JSON,
+    AfterImage JSON,
+    ChangedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT PK_ChangeLog PRIMARY KEY  (ChangeSeq)
+);
+
+-- The last change each subscriber has read
+CREATE TABLE ChangeSubscriber
+(
+    SubscriberName NVARCHAR(64) NOT NULL,
+    LastSeq BIGINT NOT NULL DEFAULT 0,
+    CONSTRAINT PK_ChangeSubscriber PRIMARY KEY  (SubscriberName)
+);
+
+
+/*
+  Triggers for the Track table. Operation is 'I' for insert, 'U' for update and 'D' for delete.
+  An insert has no before image, and a delete has no after image.
+*/
+Drop trigger if exists TR_Track_LogInsert;
+Drop trigger if exists TR_Track_LogUpdate;
+Drop trigger if exists TR_Track_LogDelete;
+
+create trigger TR_Track_LogInsert after insert on Track for each row
+  insert into ChangeLog (TableName, Operation, RowId, BeforeImage, AfterImage)
+  values ('Track', 'I', NEW.TrackId, null,
+    json_object('TrackId', NEW.TrackId, 'Name', NEW.Name, 'AlbumId', NEW.AlbumId,
+                'MediaTypeId', NEW.MediaTypeId, 'GenreId', NEW.GenreId, 'Composer', NEW.Composer,
+                'Milliseconds', NEW.Milliseconds, 'Bytes', NEW.Bytes, 'UnitPrice', NEW.UnitPrice));
+
+create trigger TR_Track_LogUpdate after update on Track for each row
+  insert into ChangeLog (TableName, Operation, RowId, BeforeImage, AfterImage)
+  values ('Track', 'U', NEW.TrackId,
+    json_object('TrackId', OLD.TrackId, 'Name', OLD.Name, 'AlbumId', OLD.AlbumId,
+                'MediaTypeId', OLD.MediaTypeId, 'GenreId', OLD.GenreId, 'Composer', OLD.Composer,
+                'Milliseconds', OLD.Milliseconds, 'Bytes', OLD.Bytes, 'UnitPrice', OLD.UnitPrice),
+    json_object('TrackId', NEW.TrackId, 'Name', NEW.Name, 'AlbumId', NEW.AlbumId,
+                'MediaTypeId', NEW.MediaTypeId, 'GenreId', NEW.GenreId, 'Composer', NEW.Composer,
+                'Milliseconds', NEW.Milliseconds, 'Bytes', NEW.Bytes, 'UnitPrice', NEW.UnitPrice));
+
+create trigger TR_Track_LogDelete after delete on Track for each row
+  insert into ChangeLog (TableName, Operation, RowId, BeforeImage, AfterImage)
+  values ('Track', 'D', OLD.TrackId,
+    json_object('TrackId', OLD.TrackId, 'Name', OLD.Name, 'AlbumId', OLD.AlbumId,
+                'MediaTypeId', OLD.MediaTypeId, 'GenreId', OLD.GenreId, 'Composer', OLD.Composer,
+                'Milliseconds', OLD.Milliseconds, 'Bytes', OLD.Bytes, 'UnitPrice', OLD.UnitPrice),
+    null);
+
+
+/*
+  Triggers for the Note table from the INSERTING lesson.
+  NOTE: Dropping a table drops its triggers, so run these again after re-creating Note.
+*/
+Drop trigger if exists TR_Note_LogInsert;
+Drop trigger if exists TR_Note_LogUpdate;
+Drop trigger if exists TR_Note_LogDelete;
+
+create trigger TR_Note_LogInsert after insert on Note for each row
+  insert into ChangeLog (TableName, Operation, RowId, BeforeImage, AfterImage)
+  values ('Note', 'I', NEW.NoteId, null,
+    json_object('NoteId', NEW.NoteId, 'CustomerId', NEW.CustomerId, 'TrackId', NEW.TrackId, 'Text', NEW.Text));
+
+create trigger TR_Note_LogUpdate after update on Note for each row
+  insert into ChangeLog (TableName, Operation, RowId, BeforeImage, AfterImage)
+  values ('Note', 'U', NEW.NoteId,
+    json_object('NoteId', OLD.NoteId, 'CustomerId', OLD.CustomerId, 'TrackId', OLD.TrackId, 'Text', OLD.Text),
+    json_object('NoteId', NEW.NoteId, 'CustomerId', NEW.CustomerId, 'TrackId', NEW.TrackId, 'Text', NEW.Text));
+
+create trigger TR_Note_LogDelete after delete on Note for each row
+  insert into ChangeLog (TableName, Operation, RowId, BeforeImage, AfterImage)
+  values ('Note', 'D', OLD.NoteId,
+    json_object('NoteId', OLD.NoteId, 'CustomerId', OLD.CustomerId, 'TrackId', OLD.TrackId, 'Text', OLD.Text),
+    null);
+
+
+/*
+  An example subscriber: a table with the total price of each album.
+  Fill it once, and register the subscriber at the current end of the log.
+
+  The fill and the registration have to agree: every change up to LastSeq must already be in
+  the fill, and every change after it must not be. So do all three steps in one transaction:
+    1. Find the end of the log with a locking read ('for share'). It waits for any transaction
+       still writing to the log, and stops new changes being logged until we commit.
+    2. Fill AlbumPrice. 'insert ... select' also reads Track with locks, so it sees the latest
+       committed prices, the same ones the log describes.
+    3. Register the subscriber at the end found in step 1.
+  NOTE: If someone changes a Track while this runs, MySQL may report a deadlock and roll this
+  transaction back. Nothing is half done, just run the transaction again.
+*/
+Drop table if exists AlbumPrice;
+
+CREATE TABLE AlbumPrice
+(
+    AlbumId INTEGER NOT NULL,
+    TotalPrice NUMERIC(10,2) NOT NULL,
+    CONSTRAINT PK_AlbumPrice PRIMARY KEY  (AlbumId)
+);
+
+start transaction;
+
+select coalesce(max(ChangeSeq), 0), count(*) into @StartSeq, @Changes from ChangeLog
+for share;
+
+insert into AlbumPrice (AlbumId, TotalPrice)
+select AlbumId, sum(UnitPrice) from Track
+group by AlbumId;
+
+insert into ChangeSubscriber (SubscriberName, LastSeq)
+values ('AlbumPrice', @StartSeq);
+
+commit;
+
+
+-- Make some changes, like the ones in the UPDATE notes
+update Track set UnitPrice = 0.98 where UnitPrice = 0.99;
+
+update Track join Album on Track.AlbumId = Album.AlbumId
+set Track.UnitPrice = 1 where Album.Title = "Rattle And Hum";
+
+
+-- Each changed row is in the log, in the order it was changed.
+-- Expected : 3290 rows, then 17 more
+select ChangeSeq, TableName, Operation, RowId,
+       BeforeImage->>'$.UnitPrice' as PriceBefore, AfterImage->>'$.UnitPrice' as PriceAfter
+from ChangeLog
+order by ChangeSeq;
+
+
+/*
+  Apply the changes to AlbumPrice.
+  Each change takes the old price away from the album's total, and adds the new one.
+  The sums are wrapped up and named 'Added', so 'on duplicate key update' can add them on.
+  Doing this inside a transaction means the totals and LastSeq are saved together, or not at all.
+
+  Be careful picking the last sequence number. MySQL hands out ChangeSeq numbers when a row is
+  inserted, not when its transaction commits. So another transaction that hasn't committed yet can
+  hold a lower number than one that already has. A plain select can't see those rows, LastSeq would
+  move past them, and they would never be read.
+
+  'for share' makes the select a locking read: it waits for any transaction still writing to the
+  log in that range to commit (or roll back) before it counts. count(*) makes it read every row
+  in the range, rather than jumping straight to the biggest one. It also tells us how many
+  changes there are to apply.
+  The 'insert ... select' below locks the rows it reads in the same way.
+
+  NOTE: This is fine for a few writers at a time, as in these lessons. A very busy system would
+  read its changes from MySQL's own binary log instead.
+*/
+start transaction;
+
+select LastSeq into @FromSeq from ChangeSubscriber where SubscriberName = 'AlbumPrice' for update;
+select coalesce(max(ChangeSeq), @FromSeq), count(*) into @ToSeq, @Changes from ChangeLog
+where ChangeSeq > @FromSeq
+for share;
+
+-- Expected : 3307 changes (3290 from the first update, 17 from the second)
+select @FromSeq, @ToSeq, @Changes;
+
+insert into AlbumPrice (AlbumId, TotalPrice)
+select * from (
+  select AlbumId, sum(Delta) as TotalPrice from (
+    select BeforeImage->>'$.AlbumId' as AlbumId, -cast(BeforeImage->>'$.UnitPrice' as decimal(10,2)) as Delta
+    from ChangeLog
+    where TableName = 'Track' and BeforeImage is not null and ChangeSeq > @FromSeq and ChangeSeq <= @ToSeq
+    union all
+    select AfterImage->>'$.AlbumId', cast(AfterImage->>'$.UnitPrice' as decimal(10,2))
+    from ChangeLog
+    where TableName = 'Track' and AfterImage is not null and ChangeSeq > @FromSeq and ChangeSeq <= @ToSeq
+  ) as Changes
+  group by AlbumId
+) as Added
+on duplicate key update TotalPrice = AlbumPrice.TotalPrice + Added.TotalPrice;
+
+update ChangeSubscriber set LastSeq = @ToSeq where SubscriberName = 'AlbumPrice';
+
+commit;
+
+
+-- Check AlbumPrice against the Track table, both ways round: totals that don't match,
+-- and albums with tracks but no total at all. This should return no rows.
+with Actual as (
+  select AlbumId, sum(UnitPrice) as TotalPrice from Track
+  group by AlbumId
+)
+select 'AlbumPrice' as Found, AlbumPrice.AlbumId, AlbumPrice.TotalPrice, Actual.TotalPrice from AlbumPrice
+left join Actual on AlbumPrice.AlbumId = Actual.AlbumId
+where AlbumPrice.TotalPrice <> coalesce(Actual.TotalPrice, 0)
+union all
+select 'Track', Actual.AlbumId, null, Actual.TotalPrice from Actual
+left join AlbumPrice on AlbumPrice.AlbumId = Actual.AlbumId
+where AlbumPrice.AlbumId is null;
+
+
+/*
+  The log only ever grows. Once every subscriber has read a change, it can be removed.
+  This relies on LastSeq never moving past a change that wasn't committed yet, which is why
+  the locking read above matters.
+*/
+delete from ChangeLog
+where ChangeSeq <= (select min(LastSeq) from ChangeSubscriber);